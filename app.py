@@ -1,9 +1,21 @@
 import streamlit as st
 import google.generativeai as genai
 import requests
+import httpx
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
+import orjson
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import asyncio
+import csv
+import hashlib
 import io
+import json
+import queue
 
 # Page configuration
 st.set_page_config(
@@ -12,6 +24,74 @@ st.set_page_config(
     layout="wide"
 )
 
+# Static prompt scaffold, sent as the system instruction so it forms a stable
+# prefix across requests; only the short per-topic turn varies.
+SYSTEM_INSTRUCTION = """You write social media captions for the palm industry.
+The caption should be engaging, informative, and suitable for platforms like Instagram or LinkedIn.
+Use the requested tone and stay within the maximum number of words.
+Include relevant hashtags at the end.
+Focus on the palm industry context."""
+
+# Caption tones offered in the UI, with their lowercase prompt form precomputed
+TONES = ["Professional", "Casual", "Educational", "Inspiring", "Informative"]
+_TONE_LC = {t: t.lower() for t in TONES}
+
+# Per-request prompt templates; the static instructions live in SYSTEM_INSTRUCTION
+_PROMPT = "Topic: {topic}\nTone: {tone}\nMax words: {max_length}"
+_BATCH_PROMPT = (
+    "Return a JSON array of captions, one per topic, in the same order as the topics. "
+    "Return only the JSON array.\n"
+    "Tone: {tone}\nMax words: {max_length}\nTopics: {topics}"
+)
+
+# Short, non-reversible fingerprint of an API key for use in cache keys
+def key_hash(api_key):
+    return hashlib.sha256(api_key.encode()).hexdigest()[:8]
+
+# (connect, read) timeout for Unsplash requests, so a stalled upstream
+# can't hang the script thread
+UNSPLASH_TIMEOUT = (3, 10)
+
+# Retry policy shared by the requests session and the HTTP/2 batch client:
+# number of retries, backoff factor, and the status codes worth retrying
+UNSPLASH_RETRIES = 3
+UNSPLASH_BACKOFF = 0.3
+UNSPLASH_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Shared HTTP session for Unsplash, reused across reruns for connection pooling.
+# Transient failures and rate limiting are retried with backoff; read timeouts
+# are not, so a stall fails fast as requests.Timeout. Retry-After is ignored so
+# a server can't stretch the wait, and the final 429/5xx response is returned
+# for the caller to inspect rather than raised as RetryError.
+@st.cache_resource
+def get_http(api_key) -> requests.Session:
+    retries = Retry(
+        total=UNSPLASH_RETRIES,
+        read=False,
+        backoff_factor=UNSPLASH_BACKOFF,
+        status_forcelist=UNSPLASH_RETRY_STATUSES,
+        allowed_methods=["GET"],
+        respect_retry_after_header=False,
+        raise_on_status=False
+    )
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(max_retries=retries, pool_connections=4, pool_maxsize=16))
+    session.headers["Authorization"] = f"Client-ID {api_key}"
+    return session
+
+# Configured Gemini model, built once per (api_key, name) and reused across reruns
+@st.cache_resource
+def get_model(api_key, name="gemini-1.5-flash-latest"):
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(name, system_instruction=SYSTEM_INSTRUCTION)
+
+# Models supporting generateContent; list_models() is a paginated REST call,
+# so the filtered names are cached briefly per API key
+@st.cache_data(ttl=300, show_spinner=False)
+def _list_generate_models(api_key_hash, _api_key):
+    genai.configure(api_key=_api_key)
+    return [m.name for m in genai.list_models() if 'generateContent' in m.supported_generation_methods]
+
 # Title and description
 st.title("🌴 Palm Industry Content Agent")
 st.markdown("Generate engaging social media content for the palm industry with AI-powered captions and real stock photos.")
@@ -62,13 +142,11 @@ with st.sidebar:
         if st.button("🔍 Test Gemini API"):
             with st.spinner("Testing..."):
                 try:
-                    genai.configure(api_key=gemini_api_key)
-                    models = list(genai.list_models())
+                    models = _list_generate_models(key_hash(gemini_api_key), gemini_api_key)
                     st.success("✅ Gemini API is working!")
                     st.write("Available models:")
-                    for m in models:
-                        if 'generateContent' in m.supported_generation_methods:
-                            st.text(f"✓ {m.name}")
+                    for name in models:
+                        st.text(f"✓ {name}")
                 except Exception as e:
                     st.error(f"❌ Error: {str(e)}")
     
@@ -77,18 +155,43 @@ with st.sidebar:
             with st.spinner("Testing..."):
                 try:
                     test_url = "https://api.unsplash.com/photos/random"
-                    headers = {"Authorization": f"Client-ID {unsplash_api_key}"}
-                    response = requests.get(test_url, headers=headers)
+                    response = get_http(unsplash_api_key).get(test_url, timeout=UNSPLASH_TIMEOUT)
                     if response.status_code == 200:
                         st.success("✅ Unsplash API is working!")
                     else:
                         st.error(f"❌ Status {response.status_code}: {response.text}")
+                except requests.Timeout:
+                    st.error("❌ Unsplash API timed out. Please try again.")
                 except Exception as e:
                     st.error(f"❌ Error: {str(e)}")
 
+# Columns of the content history, in CSV export order
+HISTORY_COLUMNS = ['timestamp', 'topic', 'tone', 'caption', 'image_url', 'photographer', 'photographer_url']
+
+# Maximum number of history entries kept; older ones are dropped
+MAX_HISTORY = 500
+
+# Format one row as a CSV line
+def csv_line(values):
+    buf = io.StringIO()
+    csv.writer(buf, lineterminator="\n").writerow(values)
+    return buf.getvalue()
+
+CSV_HEADER = csv_line(HISTORY_COLUMNS)
+
+# Reset the content history along with its pre-formatted CSV export lines.
+# History is stored column-wise (one bounded deque per column) so building the
+# DataFrame needs no row-to-column transpose and render/export cost stays capped.
+# history_rev counts additions, so a full history still registers changes.
+def reset_history():
+    st.session_state.generated_content = {c: deque(maxlen=MAX_HISTORY) for c in HISTORY_COLUMNS}
+    st.session_state.csv_lines = deque(maxlen=MAX_HISTORY)
+    st.session_state.history_rev = 0
+    st.session_state.history_df = None
+
 # Initialize session state for storing generated content
 if 'generated_content' not in st.session_state:
-    st.session_state.generated_content = []
+    reset_history()
 
 # Main content area
 col1, col2 = st.columns([1, 1])
@@ -104,7 +207,7 @@ with col1:
     
     tone = st.selectbox(
         "Caption Tone",
-        ["Professional", "Casual", "Educational", "Inspiring", "Informative"],
+        TONES,
         help="Select the desired tone for your caption"
     )
     
@@ -116,141 +219,370 @@ with col1:
         help="Maximum number of words for the caption"
     )
     
+    with st.expander("Advanced: multi-topic"):
+        topics_text = st.text_area(
+            "Topics (one per line)",
+            placeholder="Harvesting Dates\nSustainable Farming\nPalm Oil Benefits",
+            help="Generate captions for several topics in a single request. Overrides the topic above."
+        )
+    topics = [t.strip() for t in topics_text.splitlines() if t.strip()]
+    
     generate_btn = st.button("🚀 Generate Content", type="primary", use_container_width=True)
 
 with col2:
     st.subheader("📊 Generated Content")
     content_placeholder = st.empty()
 
-# Function to generate caption using Gemini - UPDATED VERSION
-def generate_caption(topic, tone, max_length, api_key):
-    try:
-        genai.configure(api_key=api_key)
-        
-        # Use the correct current model name
-        model = genai.GenerativeModel('gemini-1.5-flash-latest')
-        
-        prompt = f"""Create a {tone.lower()} social media caption about "{topic}" for the palm industry. 
-        The caption should be engaging, informative, and suitable for platforms like Instagram or LinkedIn.
-        Maximum length: {max_length} words.
-        Include relevant hashtags at the end.
-        Focus on the palm industry context."""
-        
-        response = model.generate_content(prompt)
-        return response.text
-        
-    except Exception as e:
-        error_msg = str(e)
+# Stream a completion, passing each piece of text to on_chunk as it arrives
+def stream_caption(model, prompt, on_chunk=None):
+    buf = []
+    for chunk in model.generate_content(prompt, stream=True):
+        buf.append(chunk.text)
+        if on_chunk:
+            on_chunk(chunk.text)
+    return "".join(buf)
+
+# Gemini models to try, in order of preference
+MODEL_PRIORITY = ["gemini-1.5-flash-latest", "models/gemini-1.5-flash", "models/gemini-1.5-pro"]
+
+# First model in MODEL_PRIORITY that the API key can use, found from the cached
+# model list rather than by trial generation; None if none of them are listed.
+# Errors propagate so that a failed lookup isn't cached.
+@st.cache_data(ttl=600, show_spinner=False)
+def _probe(api_key_hash, _api_key):
+    available = set(_list_generate_models(api_key_hash, _api_key))
+    for name in MODEL_PRIORITY:
+        full_name = name if name.startswith("models/") else f"models/{name}"
+        if full_name in available:
+            return name
+    return None
+
+# Gemini models to try for this API key, last working model first
+def model_order():
+    preferred = st.session_state.get("working_model")
+    return ([preferred] if preferred else []) + [m for m in MODEL_PRIORITY if m != preferred]
+
+# Run a prompt against each model in turn until one is found.
+# Returns (model_name, text); raises RuntimeError with a user-facing message.
+def generate_text(api_key, models, prompt, on_chunk=None):
+    error_msg = None
+    models = list(models)
+    probed = False
+    
+    while models:
+        name = models.pop(0)
+        try:
+            return name, stream_caption(get_model(api_key, name), prompt, on_chunk)
+        except Exception as e:
+            if error_msg is None:
+                error_msg = str(e)
+            
+            # Only a missing model is worth retrying with the next one
+            if "404" not in str(e) and "not found" not in str(e):
+                raise RuntimeError(f"❌ Error generating caption: {str(e)}\n\nPlease check your API key.")
         
-        # If model not found, try alternative models
-        if "404" in error_msg or "not found" in error_msg:
+        # A fallback is needed, so check the model list once for which to try next
+        if not probed:
+            probed = True
             try:
-                # Try the latest stable model
-                model = genai.GenerativeModel('models/gemini-1.5-flash')
-                response = model.generate_content(prompt)
-                return response.text
-            except:
-                try:
-                    # Try pro version
-                    model = genai.GenerativeModel('models/gemini-1.5-pro')
-                    response = model.generate_content(prompt)
-                    return response.text
-                except Exception as e2:
-                    return f"❌ Error: Unable to find working Gemini model.\n\nOriginal error: {error_msg}\n\nPlease verify your API key at: https://aistudio.google.com/app/apikey\n\nTip: Click 'Test Gemini API' button in sidebar to see available models."
-        
-        return f"❌ Error generating caption: {error_msg}\n\nPlease check your API key."
+                best = _probe(key_hash(api_key), api_key)
+            except Exception:
+                best = None
+            if best in models:
+                models.remove(best)
+                models.insert(0, best)
+    
+    raise RuntimeError(f"❌ Error: Unable to find working Gemini model.\n\nOriginal error: {error_msg}\n\nPlease verify your API key at: https://aistudio.google.com/app/apikey\n\nTip: Click 'Test Gemini API' button in sidebar to see available models.")
+
+# Function to generate caption using Gemini - UPDATED VERSION
+# Errors are raised rather than returned so that st.cache_data never stores them.
+# Streamed text goes to the _on_chunk callback instead of st elements, since
+# elements written from inside a cached function would be replayed on cache hits.
+# Returns (model_name, caption) so the caller can remember the working model.
+@st.cache_data(ttl=3600, show_spinner=False)
+def _cached_caption(topic, tone, max_length, api_key_hash, _api_key, _models, _on_chunk=None):
+    prompt = _PROMPT.format_map({"tone": _TONE_LC[tone], "topic": topic, "max_length": max_length})
+    return generate_text(_api_key, _models, prompt, _on_chunk)
+
+def generate_caption(topic, tone, max_length, api_key, on_chunk=None):
+    try:
+        name, caption = _cached_caption(topic, tone, max_length, key_hash(api_key), api_key, model_order(), on_chunk)
+    except RuntimeError as e:
+        return str(e)
+    
+    st.session_state.working_model = name
+    return caption
+
+# Generate captions for several topics in one request, returned as a JSON array
+@st.cache_data(ttl=3600, show_spinner=False)
+def _cached_captions_batch(topics, tone, max_length, api_key_hash, _api_key, _models):
+    prompt = _BATCH_PROMPT.format_map({"tone": _TONE_LC[tone], "max_length": max_length, "topics": json.dumps(list(topics))})
+    name, text = generate_text(_api_key, _models, prompt)
+    
+    # Models sometimes wrap JSON in a markdown code fence
+    text = text.strip().removeprefix("```json").removeprefix("```").removesuffix("```")
+    try:
+        captions = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise RuntimeError(f"❌ Error parsing captions: {str(e)}")
+    if not isinstance(captions, list) or len(captions) != len(topics):
+        raise RuntimeError(f"❌ Error: Expected {len(topics)} captions but the model returned a different number.")
+    
+    # Accept plain strings, or objects carrying a "caption" field
+    captions = [c.get("caption") if isinstance(c, dict) else c for c in captions]
+    if not all(isinstance(c, str) for c in captions):
+        raise RuntimeError("❌ Error: The model returned captions in an unexpected format. Please try again.")
+    return name, captions
+
+# Returns a list of captions, one per topic, or a single error message string
+def generate_captions_batch(topics, tone, max_length, api_key):
+    try:
+        name, captions = _cached_captions_batch(tuple(topics), tone, max_length, key_hash(api_key), api_key, model_order())
+    except RuntimeError as e:
+        return str(e)
+    
+    st.session_state.working_model = name
+    return captions
+
+UNSPLASH_SEARCH_URL = "https://api.unsplash.com/search/photos"
+
+# Search parameters for the Unsplash photo matching a topic
+def unsplash_params(query):
+    return {
+        "query": f"palm {query}",
+        "per_page": 1,
+        "orientation": "landscape"
+    }
+
+# Extract the first photo from an Unsplash search response, or None
+def parse_unsplash_results(data):
+    if data['results']:
+        photo = data['results'][0]
+        return {
+            'url': photo['urls']['regular'],
+            'small_url': photo['urls']['small'],
+            'thumb_url': photo['urls']['thumb'],
+            'photographer': photo['user']['name'],
+            'photographer_url': photo['user']['links']['html'],
+            'download_url': photo['links']['download']
+        }
+    else:
+        return None
 
 # Function to fetch image from Unsplash
+# Shorter TTL than captions so photo results stay fresh
+@st.cache_data(ttl=600, show_spinner=False)
+def _cached_unsplash_image(query, api_key_hash, _api_key):
+    response = get_http(_api_key).get(UNSPLASH_SEARCH_URL, params=unsplash_params(query), timeout=UNSPLASH_TIMEOUT)
+    response.raise_for_status()
+    
+    return parse_unsplash_results(orjson.loads(response.content))
+
 def fetch_unsplash_image(query, api_key):
     try:
-        url = "https://api.unsplash.com/search/photos"
-        headers = {"Authorization": f"Client-ID {api_key}"}
-        params = {
-            "query": f"palm {query}",
-            "per_page": 1,
-            "orientation": "landscape"
-        }
-        
-        response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status()
-        
-        data = response.json()
-        
-        if data['results']:
-            photo = data['results'][0]
-            return {
-                'url': photo['urls']['regular'],
-                'thumb_url': photo['urls']['thumb'],
-                'photographer': photo['user']['name'],
-                'photographer_url': photo['user']['links']['html'],
-                'download_url': photo['links']['download']
-            }
-        else:
-            return None
+        return _cached_unsplash_image(query, key_hash(api_key), api_key)
+    except requests.Timeout:
+        st.error("Error fetching image: Unsplash timed out. Please try again.")
+        return None
     except Exception as e:
         st.error(f"Error fetching image: {str(e)}")
         return None
 
+# Maximum number of Unsplash searches in flight at once for a batch
+UNSPLASH_MAX_CONCURRENCY = 8
+
+# Search Unsplash for several topics at once, multiplexed over a single HTTP/2
+# connection. Failed searches are returned as exceptions in their slot.
+# Retries follow the session's Retry policy: the same statuses and backoff
+# schedule, Retry-After ignored, and the final response's status raised.
+async def _fetch_many(queries, api_key):
+    semaphore = asyncio.Semaphore(UNSPLASH_MAX_CONCURRENCY)
+    
+    async with httpx.AsyncClient(
+        headers={"Authorization": f"Client-ID {api_key}"},
+        timeout=httpx.Timeout(UNSPLASH_TIMEOUT[1], connect=UNSPLASH_TIMEOUT[0]),
+        transport=httpx.AsyncHTTPTransport(http2=True, retries=UNSPLASH_RETRIES)
+    ) as client:
+        async def fetch(query):
+            async with semaphore:
+                for attempt in range(UNSPLASH_RETRIES + 1):
+                    # Same schedule as urllib3: no wait before the first retry
+                    if attempt > 1:
+                        await asyncio.sleep(UNSPLASH_BACKOFF * 2 ** (attempt - 1))
+                    response = await client.get(UNSPLASH_SEARCH_URL, params=unsplash_params(query))
+                    if response.status_code not in UNSPLASH_RETRY_STATUSES:
+                        break
+            response.raise_for_status()
+            return parse_unsplash_results(orjson.loads(response.content))
+        
+        return await asyncio.gather(*[fetch(q) for q in queries], return_exceptions=True)
+
+# Raised from the cached batch fetch so a partially failed batch isn't cached,
+# while still handing its per-topic results back to the caller
+class _PartialBatch(Exception):
+    def __init__(self, results):
+        super().__init__("Some image searches failed")
+        self.results = results
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _cached_unsplash_images(queries, api_key_hash, _api_key):
+    results = asyncio.run(_fetch_many(queries, _api_key))
+    if any(isinstance(result, Exception) for result in results):
+        raise _PartialBatch(results)
+    return results
+
+def fetch_unsplash_images(queries, api_key):
+    try:
+        return _cached_unsplash_images(tuple(queries), key_hash(api_key), api_key)
+    except _PartialBatch as e:
+        results = e.results
+    
+    # Report each distinct error once, however many topics it affected
+    images = []
+    errors = {}
+    for result in results:
+        if isinstance(result, httpx.TimeoutException):
+            errors["Error fetching image: Unsplash timed out. Please try again."] = None
+            result = None
+        elif isinstance(result, Exception):
+            errors[f"Error fetching image: {str(result)}"] = None
+            result = None
+        images.append(result)
+    for message in errors:
+        st.error(message)
+    return images
+
+# Append a generated item to the history and its CSV export buffer
+def add_to_history(topic, tone, caption, image_data):
+    row = {
+        'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'topic': topic,
+        'tone': tone,
+        'caption': caption,
+        'image_url': image_data['url'],
+        'photographer': image_data['photographer'],
+        'photographer_url': image_data['photographer_url']
+    }
+    for k, v in row.items():
+        st.session_state.generated_content[k].append(v)
+    st.session_state.csv_lines.append(csv_line([row[c] for c in HISTORY_COLUMNS]))
+    st.session_state.history_rev += 1
+
+# Render one caption/image result in the current container.
+# Returns True if the content was complete and added to the history.
+def show_content(topic, tone, caption, image_data, warn_no_image=True):
+    # Check if caption generation was successful
+    if "❌" in caption:
+        # Show error message
+        st.error(caption)
+        return False
+    
+    if not image_data:
+        # Show caption even without image
+        st.markdown("**Generated Caption:**")
+        st.info(caption)
+        if warn_no_image:
+            st.warning("⚠️ No image found for this topic. Try a different search term.")
+        return False
+    
+    # Display generated content
+    img_col, text_col = st.columns([1, 1])
+    
+    with img_col:
+        # Preview at small size; the full-resolution image loads only when expanded
+        st.image(image_data['small_url'], use_container_width=True)
+        st.caption(f"📷 Photo by [{image_data['photographer']}]({image_data['photographer_url']}) on Unsplash")
+        with st.expander("View full image"):
+            st.image(image_data['url'], use_container_width=True)
+    
+    with text_col:
+        st.markdown("**Generated Caption:**")
+        st.info(caption)
+    
+    # Add to session state
+    add_to_history(topic, tone, caption, image_data)
+    return True
+
 # Generate content when button is clicked
 if generate_btn:
     if not gemini_api_key:
         st.error("⚠️ Please enter your Google Gemini API key in the sidebar.")
     elif not unsplash_api_key:
         st.error("⚠️ Please enter your Unsplash API key in the sidebar.")
-    elif not topic:
+    elif not topic and not topics:
         st.error("⚠️ Please enter a topic.")
-    else:
-        with st.spinner("🤖 Generating caption..."):
-            caption = generate_caption(topic, tone, max_length, gemini_api_key)
+    elif topics:
+        # One Gemini request covers every topic; the per-topic image searches
+        # are multiplexed over one HTTP/2 connection while it runs.
+        with st.spinner(f"🤖 Generating {len(topics)} posts..."):
+            with ThreadPoolExecutor(
+                max_workers=1,
+                initializer=add_script_run_ctx,
+                initargs=(None, get_script_run_ctx())
+            ) as ex:
+                f_caps = ex.submit(generate_captions_batch, topics, tone, max_length, gemini_api_key)
+                images = fetch_unsplash_images(topics, unsplash_api_key)
+                captions = f_caps.result()
         
-        # Check if caption generation was successful
-        if "❌" not in caption:
-            with st.spinner("🖼️ Fetching image..."):
-                image_data = fetch_unsplash_image(topic, unsplash_api_key)
-            
-            if image_data:
-                # Display generated content
-                with content_placeholder.container():
-                    img_col, text_col = st.columns([1, 1])
-                    
-                    with img_col:
-                        st.image(image_data['url'], use_container_width=True)
-                        st.caption(f"📷 Photo by [{image_data['photographer']}]({image_data['photographer_url']}) on Unsplash")
-                    
-                    with text_col:
-                        st.markdown("**Generated Caption:**")
-                        st.info(caption)
+        with content_placeholder.container():
+            generated = 0
+            if isinstance(captions, str):
+                # Show error message
+                st.error(captions)
+            else:
+                for batch_topic, caption, image_data in zip(topics, captions, images):
+                    st.markdown(f"#### {batch_topic}")
+                    generated += show_content(batch_topic, tone, caption, image_data, warn_no_image=False)
+                
+                # One warning for every topic left without an image
+                missing = [t for t, image_data in zip(topics, images) if not image_data]
+                if missing:
+                    st.warning(f"⚠️ No image found for: {', '.join(missing)}. Try different search terms.")
+        
+        if generated:
+            st.success(f"✅ Generated {generated} of {len(topics)} posts successfully!")
+    else:
+        # Caption and image are independent, so fetch both in parallel.
+        # Worker threads inherit the script context so st.* calls still render.
+        with st.spinner("🤖 Generating..."):
+            with ThreadPoolExecutor(
+                max_workers=2,
+                initializer=add_script_run_ctx,
+                initargs=(None, get_script_run_ctx())
+            ) as ex:
+                chunks = queue.Queue()
+                f_cap = ex.submit(generate_caption, topic, tone, max_length, gemini_api_key, chunks.put)
+                f_cap.add_done_callback(lambda _: chunks.put(None))
+                f_img = ex.submit(fetch_unsplash_image, topic, unsplash_api_key)
                 
-                # Add to session state
-                st.session_state.generated_content.append({
-                    'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    'topic': topic,
-                    'tone': tone,
-                    'caption': caption,
-                    'image_url': image_data['url'],
-                    'photographer': image_data['photographer'],
-                    'photographer_url': image_data['photographer_url']
-                })
+                # Render the caption as it streams in, until the worker finishes
+                streamed = ""
+                for text in iter(chunks.get, None):
+                    streamed += text
+                    content_placeholder.markdown(streamed)
                 
-                st.success("✅ Content generated successfully!")
-            else:
-                # Show caption even without image
-                with content_placeholder.container():
-                    st.markdown("**Generated Caption:**")
-                    st.info(caption)
-                    st.warning("⚠️ No image found for this topic. Try a different search term.")
-        else:
-            # Show error message
-            with content_placeholder.container():
-                st.error(caption)
+                caption, image_data = f_cap.result(), f_img.result()
+        
+        with content_placeholder.container():
+            generated = show_content(topic, tone, caption, image_data)
+        
+        if generated:
+            st.success("✅ Content generated successfully!")
 
 # Display content history
-if st.session_state.generated_content:
+history_len = len(st.session_state.generated_content['timestamp'])
+if history_len:
     st.markdown("---")
     st.subheader("📚 Content History")
     
-    # Create DataFrame
-    df = pd.DataFrame(st.session_state.generated_content)
+    # Create DataFrame, rebuilt only when new rows have been added
+    if st.session_state.history_df is None or st.session_state.history_df_rev != st.session_state.history_rev:
+        # Arrow-backed string columns are more compact than object dtype
+        st.session_state.history_df = pd.DataFrame(
+            {c: list(v) for c, v in st.session_state.generated_content.items()}
+        ).convert_dtypes(dtype_backend="pyarrow")
+        st.session_state.history_df_rev = st.session_state.history_rev
+    df = st.session_state.history_df
     
     # Display table
     st.dataframe(
@@ -259,17 +591,15 @@ if st.session_state.generated_content:
         hide_index=True
     )
     
-    # Download button
-    csv_buffer = io.StringIO()
-    df.to_csv(csv_buffer, index=False)
-    csv_data = csv_buffer.getvalue()
+    # Download button; the CSV bytes are only produced when the user clicks it
+    csv_lines = st.session_state.csv_lines
     
     col_download, col_clear = st.columns([3, 1])
     
     with col_download:
         st.download_button(
             label="📥 Download as CSV",
-            data=csv_data,
+            data=lambda: (CSV_HEADER + "".join(csv_lines)).encode(),
             file_name=f"palm_content_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
             mime="text/csv",
             use_container_width=True
@@ -277,7 +607,7 @@ if st.session_state.generated_content:
     
     with col_clear:
         if st.button("🗑️ Clear History", use_container_width=True):
-            st.session_state.generated_content = []
+            reset_history()
             st.rerun()
 
 # Footer